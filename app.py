@@ -1,71 +1,260 @@
 import os
+import mmap
+import bisect
+import logging
+import threading
+import weakref
+from functools import lru_cache, partial
 from dotenv import load_dotenv
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import time
-from typing import List
+from typing import Optional, Tuple
 
 # Load environment variables from .env file
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 class PiSearch:
 
-    def __init__(self, file_path: str):
+    # Layout written by build_index.py: 1001 uint64 bucket offsets, then
+    # uint32 positions grouped by 3-digit prefix
+    _INDEX_HEADER_SIZE = 1001 * 8
+
+    # Patterns come straight from requests; longer ones are searched uncached
+    # so the LRU cache cannot pin arbitrarily large strings
+    _MAX_CACHED_PATTERN_LENGTH = 64
+
+    def __init__(self, file_path: str, use_mmap: bool = True, index_path: Optional[str] = None):
+        self._fd = None
+        self._mm = None
+        self._index_mm = None
+        self._index_offsets = None
+        self._index_positions = None
+
+        # The digits never change, so search results can be memoized per instance.
+        # The cache holds only a weak proxy, so it does not keep the instance
+        # alive and __del__ still runs when the last reference goes away.
+        self._find_pattern_cached = lru_cache(maxsize=4096)(partial(PiSearch._find_pattern, weakref.proxy(self)))
+
         self.file_path = file_path
         self._file_size = os.path.getsize(file_path)
         self._num_digits = self._file_size - 1 
 
+        # One descriptor for the lifetime of the instance, shared by all requests
+        self._fd = os.open(file_path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+        # Without os.pread (Windows) reads fall back to seek+read under a lock
+        self._read_lock = threading.Lock()
+
+        # Searches are forward scans: ask the kernel for aggressive readahead
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(self._fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+
+        # Map the digits file once; every read is then a slice of the mapping
+        if use_mmap:
+            self._mm = mmap.mmap(self._fd, 0, access=mmap.ACCESS_READ)
+
+        self._validate_digits()
+
+        # Optional 3-digit prefix index: patterns of 3+ digits probe its
+        # candidate positions instead of scanning every digit. Only used with
+        # the mapping; over pread each candidate would cost a syscall, which
+        # is slower than the plain scan
+        if index_path and os.path.exists(index_path):
+            if self._mm is not None:
+                self._load_index(index_path)
+            else:
+                logger.info("Ignoring index %s: it is only used with the mmap read path", index_path)
+
+        # Without an index searches are forward scans, so ask for aggressive
+        # readahead; index probes are random and would pay for it on a cold cache
+        if self._mm is not None and self._index_positions is None and hasattr(mmap, 'MADV_SEQUENTIAL'):
+            self._mm.madvise(mmap.MADV_SEQUENTIAL)
+
+    def _load_index(self, index_path: str) -> None:
+        """Map the prefix index, or leave it unset if it does not match the digits file."""
+        num_positions = max(self._num_digits - 2, 0)
+        index_size = os.path.getsize(index_path)
+        if index_size != self._INDEX_HEADER_SIZE + num_positions * 4:
+            logger.warning("Ignoring index %s: %d bytes does not fit %d digits",
+                           index_path, index_size, self._num_digits)
+            return
+
+        with open(index_path, 'rb') as f:
+            self._index_mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        index_view = memoryview(self._index_mm)
+        self._index_offsets = index_view[:self._INDEX_HEADER_SIZE].cast('Q')
+        self._index_positions = index_view[self._INDEX_HEADER_SIZE:].cast('I')
+        index_view.release()
+
+        if len(self._index_positions) != num_positions or self._index_offsets[-1] != num_positions:
+            logger.warning("Ignoring index %s: bucket offsets do not cover %d positions",
+                           index_path, num_positions)
+            self._close_index()
+            return
+
+        # Buckets are filled in file order, so the last entry of each bucket is
+        # written last: if it points at its own prefix, the build completed
+        offsets = self._index_offsets
+        for key in range(len(offsets) - 1):
+            if offsets[key] == offsets[key + 1]:
+                continue
+            position = self._index_positions[offsets[key + 1] - 1]
+            if self._get_digit_range(position, position + 3) != f"{key:03d}":
+                logger.warning("Ignoring index %s: entry for prefix %03d does not match the digits",
+                               index_path, key)
+                self._close_index()
+                return
+
+    def _close_index(self) -> None:
+        if self._index_mm is not None:
+            # Views must be released before their mapping can be closed
+            self._index_offsets.release()
+            self._index_positions.release()
+            self._index_offsets = None
+            self._index_positions = None
+            self._index_mm.close()
+            self._index_mm = None
+
+    def close(self) -> None:
+        self._find_pattern_cached.cache_clear()
+        self._close_index()
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __del__(self):
+        self.close()
+
     @property
     def num_digits(self) -> int:
         return self._num_digits
 
+    def _read_at(self, offset: int, size: int) -> bytes:
+        if hasattr(os, 'pread'):
+            return os.pread(self._fd, size, offset)
+
+        with self._read_lock:
+            os.lseek(self._fd, offset, os.SEEK_SET)
+            return os.read(self._fd, size)
+
+    def _validate_digits(self) -> None:
+        """Check once that the file holds only ASCII digits, so reads need no per-digit checks."""
+        chunk_size = 64 << 20
+        for start in range(0, self._num_digits, chunk_size):
+            end = min(start + chunk_size, self._num_digits)
+            if self._mm is not None:
+                chunk = self._mm[start:end]
+            else:
+                chunk = self._read_at(start, end - start)
+
+            # translate drops every digit and keeps the rest in order
+            invalid = chunk.translate(None, b'0123456789')
+            if invalid:
+                position = start + chunk.find(invalid[:1])
+                raise ValueError(f"Invalid digit {invalid[:1]!r} found at position {position}")
+
+    def _prefetch(self, start: int, length: int) -> None:
+        """Hint that the mapped bytes from start are about to be read."""
+        if not hasattr(mmap, 'MADV_WILLNEED'):
+            return
+
+        # madvise needs a page-aligned start
+        aligned_start = start - start % mmap.PAGESIZE
+        if aligned_start < self._file_size:
+            self._mm.madvise(mmap.MADV_WILLNEED, aligned_start, length + start - aligned_start)
+
     def _get_digit_range(self, start: int, end: int) -> str:
-        with open(self.file_path, 'r') as f:
-            f.seek(start)
-            return f.read(end - start)
+        if self._mm is not None:
+            return self._mm[start:end].decode('ascii')
+        return self._read_at(start, end - start).decode('ascii')
 
     def _digit_at_position(self, position: int) -> int:
         if position < 0 or position >= self._num_digits:
             raise ValueError(f"Position {position} is out of range.")
 
-        digit = int(self._get_digit_range(position, position + 1))
-        if not 0 <= digit <= 9:
-            raise ValueError(f"Invalid digit {digit} found at position {position}")
-        
-        return digit
+        return int(self._get_digit_range(position, position + 1))
 
-    def get_digits(self, start_position: int, count: int) -> List[int]:
+    def get_digits(self, start_position: int, count: int) -> str:
         if start_position < 0 or start_position >= self._num_digits:
             raise ValueError(f"Start position {start_position} is out of range.")
 
         if start_position + count > self._num_digits:
             count = self._num_digits - start_position
 
-        digits_str = self._get_digit_range(start_position, start_position + count)
-        return [int(d) for d in digits_str]
+        return self._get_digit_range(start_position, start_position + count)
+
+    def get_context(self, position: int, length: int, padding: int = 10) -> Tuple[int, str]:
+        """Return the start position and digits of a match plus padding digits on each side."""
+        context_start = max(0, position - padding)
+        context_end = min(self._num_digits, position + length + padding)
+        return context_start, self._get_digit_range(context_start, context_end)
 
-    def find_pattern(self, pattern: str, start_position: int = 0) -> int:
+    def find_pattern(self, pattern: str, start_position: int = 0, use_cache: bool = True) -> int:
         """Find the first occurrence of the pattern starting from start_position."""
-        pattern_digits = [int(d) for d in pattern]
-        pattern_length = len(pattern_digits)
-        
-        # Read a chunk of digits to search through
-        chunk_size = 10000  # Adjust this value based on performance needs
+        if use_cache and len(pattern) <= self._MAX_CACHED_PATTERN_LENGTH:
+            return self._find_pattern_cached(pattern, start_position)
+        return self._find_pattern(pattern, start_position)
+
+    def _find_pattern(self, pattern: str, start_position: int) -> int:
+        if start_position < 0:
+            raise ValueError(f"Start position {start_position} is out of range.")
+
+        pattern_bytes = pattern.encode('ascii')
+        if self._index_positions is not None and len(pattern_bytes) >= 3:
+            return self._find_pattern_indexed(pattern, start_position)
+
+        # Scan in blocks that end on chunk_size boundaries, so every block after
+        # the first is page-aligned; blocks overlap by pattern_length - 1 so
+        # patterns that span a seam are still found
+        chunk_size = 1 << 20
+        overlap = len(pattern_bytes) - 1
         current_pos = start_position
-        
+
+        if self._mm is not None:
+            self._prefetch(current_pos, chunk_size)
+
         while current_pos < self._num_digits:
-            # Get a chunk of digits
-            end_pos = min(current_pos + chunk_size, self._num_digits)
-            chunk = self.get_digits(current_pos, end_pos - current_pos)
-            
-            # Search for pattern in the chunk
-            for i in range(len(chunk) - pattern_length + 1):
-                if chunk[i:i + pattern_length] == pattern_digits:
-                    return current_pos + i
-            
-            # Move to next chunk, overlapping by pattern_length - 1 to handle patterns that span chunk boundaries
-            current_pos += chunk_size - (pattern_length - 1)
-        
+            end_pos = min(current_pos - current_pos % chunk_size + chunk_size, self._num_digits)
+            scan_end = min(end_pos + overlap, self._num_digits)
+
+            if self._mm is not None:
+                # Start readahead of the next block while this one is scanned;
+                # mmap.find runs CPython's C-level fast search over the mapped bytes
+                self._prefetch(end_pos, chunk_size)
+                index = self._mm.find(pattern_bytes, current_pos, scan_end)
+            else:
+                index = self._read_at(current_pos, scan_end - current_pos).find(pattern_bytes)
+                if index != -1:
+                    index += current_pos
+
+            if index != -1:
+                return index
+            current_pos = end_pos
+
+        return -1
+
+    def _find_pattern_indexed(self, pattern: str, start_position: int) -> int:
+        """Find the pattern by checking only positions that share its 3-digit prefix."""
+        key = int(pattern[:3])
+        bucket_start = self._index_offsets[key]
+        bucket_end = self._index_offsets[key + 1]
+
+        # Positions are ascending within a bucket; only those where the whole
+        # pattern still fits before num_digits are candidates
+        pattern_length = len(pattern)
+        first = bisect.bisect_left(self._index_positions, start_position, bucket_start, bucket_end)
+        last = bisect.bisect_right(self._index_positions, self._num_digits - pattern_length, first, bucket_end)
+
+        # Compare the whole pattern, not just the digits after the bucket key
+        for position in self._index_positions[first:last]:
+            if self._get_digit_range(position, position + pattern_length) == pattern:
+                return position
+
         return -1
 
 
@@ -76,8 +265,14 @@ CORS(app)  # Enable CORS for all routes
 # File path for the π digits
 PI_FILE_PATH = 'pi_dev-2t_02.txt'
 
+# Set PI_USE_MMAP=0 to read with pread instead (e.g. file on a network mount)
+PI_USE_MMAP = os.getenv('PI_USE_MMAP', '1') != '0'
+
+# Prefix index built by build_index.py; searches fall back to a scan without it
+PI_INDEX_PATH = 'pi_dev-2t_02.idx3'
+
 # Initialize PiSearch with the text file
-pi_search = PiSearch(PI_FILE_PATH)
+pi_search = PiSearch(PI_FILE_PATH, use_mmap=PI_USE_MMAP, index_path=PI_INDEX_PATH)
 
 @app.route('/api/search', methods=['POST'])
 def search_api():
@@ -88,20 +283,21 @@ def search_api():
         
     pattern = data.get('pattern', '')
     start_position = int(data.get('start_position', 0))
+    use_cache = request.args.get('no_cache') != '1'
 
-    if not pattern or not pattern.isdigit():
+    if not pattern or not (pattern.isascii() and pattern.isdigit()):
         return jsonify({'error': 'Invalid pattern'}), 400
 
     start_time = time.time()
     try:
-        found_position = pi_search.find_pattern(pattern, start_position)
+        found_position = pi_search.find_pattern(pattern, start_position, use_cache=use_cache)
         search_time = time.time() - start_time
 
-        # Get 20 characters around the found position (10 before and 10 after)
-        context_start = max(0, found_position - 10)
-        context_end = min(pi_search.num_digits, found_position + len(pattern) + 10)
-        context = pi_search.get_digits(context_start, context_end - context_start)
-        context_str = ''.join(str(d) for d in context)
+        # Get 20 characters around the found position (10 before and 10 after);
+        # there is nothing to read when the pattern was not found
+        context_start, context_str = 0, ''
+        if found_position != -1:
+            context_start, context_str = pi_search.get_context(found_position, len(pattern))
 
         return jsonify({
             'success': True,
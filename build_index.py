@@ -0,0 +1,74 @@
+import os
+import numpy as np
+from tqdm import tqdm
+
+# Index layout: (NUM_BUCKETS + 1) uint64 bucket offsets, then uint32 positions
+# grouped by 3-digit prefix and ascending within each bucket
+NUM_BUCKETS = 1000
+HEADER_SIZE = (NUM_BUCKETS + 1) * 8
+
+def build_trigram_index(digits_file: str, index_file: str, chunk_size: int = 64 * 1024 * 1024):
+    """Index every 3-digit prefix position of a digits text file."""
+
+    # Same digit count PiSearch uses (the file ends with one non-digit byte)
+    num_digits = os.path.getsize(digits_file) - 1
+    num_positions = max(num_digits - 2, 0)
+    if num_digits >= 2 ** 32:
+        raise ValueError(f"{num_digits} digits do not fit uint32 positions.")
+
+    digits = np.memmap(digits_file, dtype=np.uint8, mode='r', shape=(num_digits,))
+
+    def trigram_keys(start: int, end: int) -> np.ndarray:
+        # Keys for positions [start, end); each needs the two digits after it
+        d = digits[start:end + 2].astype(np.uint16) - ord('0')
+        return d[:-2] * 100 + d[1:-1] * 10 + d[2:]
+
+    # First pass: bucket sizes, so each bucket gets a fixed slot in the file
+    counts = np.zeros(NUM_BUCKETS, dtype=np.uint64)
+    for start in tqdm(range(0, num_positions, chunk_size), desc='Counting'):
+        end = min(start + chunk_size, num_positions)
+        counts += np.bincount(trigram_keys(start, end), minlength=NUM_BUCKETS).astype(np.uint64)
+
+    offsets = np.zeros(NUM_BUCKETS + 1, dtype=np.uint64)
+    offsets[1:] = np.cumsum(counts)
+
+    # Build next to the target and rename at the end, so an interrupted build
+    # never leaves a plausible-looking index at index_file
+    tmp_file = index_file + '.tmp'
+    with open(tmp_file, 'wb') as f:
+        f.write(offsets.tobytes())
+        f.truncate(HEADER_SIZE + num_positions * 4)
+
+    if num_positions > 0:
+        positions = np.memmap(tmp_file, dtype=np.uint32, mode='r+', offset=HEADER_SIZE, shape=(num_positions,))
+
+        # Second pass: a stable sort keeps positions ascending within each bucket,
+        # and chunks are appended in file order
+        cursor = offsets[:-1].copy()
+        for start in tqdm(range(0, num_positions, chunk_size), desc='Indexing'):
+            end = min(start + chunk_size, num_positions)
+            keys = trigram_keys(start, end)
+            order = np.argsort(keys, kind='stable')
+            chunk_counts = np.bincount(keys, minlength=NUM_BUCKETS)
+            chunk_starts = np.cumsum(chunk_counts) - chunk_counts
+
+            for key in np.nonzero(chunk_counts)[0]:
+                count = int(chunk_counts[key])
+                src = int(chunk_starts[key])
+                dst = int(cursor[key])
+                positions[dst:dst + count] = order[src:src + count] + start
+                cursor[key] += count
+
+        positions.flush()
+        # Drop the mapping before the rename (required on Windows)
+        del positions
+
+    os.replace(tmp_file, index_file)
+
+if __name__ == "__main__":
+    INPUT_FILE = "pi_dev-2t_02.txt"
+    OUTPUT_FILE = "pi_dev-2t_02.idx3"
+
+    print(f"Building 3-digit prefix index {OUTPUT_FILE}...")
+    build_trigram_index(INPUT_FILE, OUTPUT_FILE)
+    print("Done!")
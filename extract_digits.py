@@ -1,4 +1,5 @@
 import os
+import binascii
 from tqdm import tqdm
 
 def extract_digits_to_text(input_file: str, output_file: str, num_digits: int = 1_000_000_000):
@@ -7,8 +8,8 @@ def extract_digits_to_text(input_file: str, output_file: str, num_digits: int =
     # Calculate number of bytes needed (2 digits per byte)
     num_bytes = num_digits // 2
     
-    # Open output file
-    with open(output_file, 'w') as f:
+    # Open output file (binary, so no newline translation on write)
+    with open(output_file, 'wb') as f:
         # Process in chunks to manage memory
         chunk_size = 1024 * 1024  # 1MB chunks
         bytes_processed = 0
@@ -22,12 +23,9 @@ def extract_digits_to_text(input_file: str, output_file: str, num_digits: int =
                     # Read chunk from local file
                     chunk_data = input_f.read(current_chunk)
                     
-                    # Process chunk
-                    for byte in chunk_data:
-                        # Extract two digits from each byte
-                        first_digit = (byte >> 4) & 0x0F
-                        second_digit = byte & 0x0F
-                        f.write(f"{first_digit}{second_digit}")
+                    # Each byte holds two BCD digits (high nibble first), so its
+                    # hex form is exactly the two ASCII digits
+                    f.write(binascii.hexlify(chunk_data))
                     
                     bytes_processed += current_chunk
                     pbar.update(current_chunk)
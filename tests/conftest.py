@@ -0,0 +1,22 @@
+import importlib
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='session')
+def pi_search_cls(tmp_path_factory):
+    # app.py maps PI_FILE_PATH relative to the working directory on import
+    workdir = tmp_path_factory.mktemp('app')
+    (workdir / 'pi_dev-2t_02.txt').write_text('31415926535897932384\n')
+
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        app = importlib.import_module('app')
+    finally:
+        os.chdir(cwd)
+    return app.PiSearch
@@ -0,0 +1,99 @@
+import os
+import random
+
+import numpy as np
+import pytest
+
+from build_index import HEADER_SIZE, build_trigram_index
+
+NUM_DIGITS = 200_000
+
+
+@pytest.fixture
+def digits(tmp_path):
+    rng = random.Random(1234)
+    text = ''.join(rng.choice('0123456789') for _ in range(NUM_DIGITS))
+    path = tmp_path / 'digits.txt'
+    path.write_text(text + '\n')
+    return str(path), text
+
+
+@pytest.fixture
+def index_path(digits, tmp_path):
+    path = str(tmp_path / 'digits.idx3')
+    # Several chunks, so buckets are appended across chunk boundaries
+    build_trigram_index(digits[0], path, chunk_size=30_001)
+    return path
+
+
+@pytest.mark.parametrize('use_mmap', [True, False])
+def test_indexed_find_matches_str_find(pi_search_cls, digits, index_path, use_mmap):
+    path, text = digits
+    pi_search = pi_search_cls(path, use_mmap=use_mmap, index_path=index_path)
+    # The index is only used over the mapping; pread falls back to the scan
+    assert (pi_search._index_positions is not None) == use_mmap
+
+    rng = random.Random(5678)
+    cases = []
+    for _ in range(300):
+        length = rng.randint(3, 6)
+        cases.append((''.join(rng.choice('0123456789') for _ in range(length)), rng.randrange(NUM_DIGITS)))
+
+    # Bucket edges: first and last occurrence of a prefix, just past them,
+    # and patterns running up to the last digit
+    for prefix in ('000', '314', '999', text[-3:]):
+        first, last = text.find(prefix), text.rfind(prefix)
+        cases += [(prefix, 0), (prefix, first), (prefix, first + 1), (prefix, last), (prefix, last + 1)]
+    for length in (3, 4, 7):
+        cases += [(text[-length:], 0), (text[-length:], NUM_DIGITS - length), (text[-length + 1:] + '0', 0)]
+
+    for pattern, start in cases:
+        assert pi_search.find_pattern(pattern, start, use_cache=False) == text.find(pattern, start), (pattern, start)
+    pi_search.close()
+
+
+def test_mismatched_index_is_ignored(pi_search_cls, digits, index_path, tmp_path):
+    path, text = digits
+
+    # Index built for a longer file
+    shorter = tmp_path / 'shorter.txt'
+    shorter.write_text(text[:NUM_DIGITS // 2] + '\n')
+    pi_search = pi_search_cls(str(shorter), index_path=index_path)
+    assert pi_search._index_positions is None
+    assert pi_search.find_pattern('123', use_cache=False) == text[:NUM_DIGITS // 2].find('123')
+
+    with open(index_path, 'rb') as f:
+        index = f.read()
+
+    # Truncated, empty, and header-only (interrupted build) index files
+    broken = [index[:-4], b'', index[:HEADER_SIZE] + bytes(len(index) - HEADER_SIZE)]
+    for i, data in enumerate(broken):
+        broken_path = tmp_path / f'broken{i}.idx3'
+        broken_path.write_bytes(data)
+        pi_search = pi_search_cls(path, index_path=str(broken_path))
+        assert pi_search._index_positions is None
+        assert pi_search.find_pattern('999', use_cache=False) == text.find('999')
+
+
+def test_build_leaves_no_temp_file(digits, index_path):
+    assert not os.path.exists(index_path + '.tmp')
+    assert os.path.getsize(index_path) == HEADER_SIZE + (NUM_DIGITS - 2) * 4
+
+
+def test_interrupted_build_keeps_existing_index(digits, index_path, tmp_path, monkeypatch):
+    with open(index_path, 'rb') as f:
+        before = f.read()
+
+    # Rebuild from different digits, failing after the positions are filled in
+    other = tmp_path / 'other.txt'
+    other.write_text(digits[1][::-1] + '\n')
+
+    def fail_flush(self):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(np.memmap, 'flush', fail_flush)
+    with pytest.raises(KeyboardInterrupt):
+        build_trigram_index(str(other), index_path, chunk_size=30_001)
+
+    with open(index_path, 'rb') as f:
+        assert f.read() == before
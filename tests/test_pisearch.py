@@ -0,0 +1,74 @@
+import gc
+import os
+import random
+import weakref
+
+import pytest
+
+
+def test_instance_is_freed_without_cyclic_gc(pi_search_cls, tmp_path):
+    path = tmp_path / 'digits.txt'
+    path.write_text('31415926535897932384\n')
+
+    gc.disable()
+    try:
+        pi_search = pi_search_cls(str(path))
+        assert pi_search.find_pattern('926') == 5
+        fd = pi_search._fd
+        ref = weakref.ref(pi_search)
+        del pi_search
+
+        # __del__ ran on the last reference and closed the descriptor
+        assert ref() is None
+        with pytest.raises(OSError):
+            os.fstat(fd)
+    finally:
+        gc.enable()
+
+
+def test_close_clears_the_search_cache(pi_search_cls, tmp_path):
+    path = tmp_path / 'digits.txt'
+    path.write_text('31415926535897932384\n')
+
+    pi_search = pi_search_cls(str(path))
+    pi_search.find_pattern('926')
+    assert pi_search._find_pattern_cached.cache_info().currsize == 1
+    pi_search.close()
+    assert pi_search._find_pattern_cached.cache_info().currsize == 0
+
+
+def test_long_patterns_are_not_cached(pi_search_cls, tmp_path):
+    path = tmp_path / 'digits.txt'
+    path.write_text('31415926535897932384\n')
+
+    pi_search = pi_search_cls(str(path))
+    assert pi_search.find_pattern('1' * 1000) == -1
+    assert pi_search._find_pattern_cached.cache_info().currsize == 0
+
+    assert pi_search.find_pattern('3' * pi_search._MAX_CACHED_PATTERN_LENGTH) == -1
+    assert pi_search._find_pattern_cached.cache_info().currsize == 1
+    pi_search.close()
+
+
+@pytest.mark.parametrize('use_mmap', [True, False])
+def test_find_pattern_across_block_seams(pi_search_cls, tmp_path, use_mmap):
+    # Longer than two 1 MiB scan blocks, so searches cross block boundaries
+    rng = random.Random(42)
+    text = ''.join(rng.choice('0123456789') for _ in range((5 << 19) + 123))
+    path = tmp_path / 'digits.txt'
+    path.write_text(text + '\n')
+
+    pi_search = pi_search_cls(str(path), use_mmap=use_mmap)
+    for k in (1, 2):
+        seam = k * (1 << 20)
+        for j in range(1, 9):
+            start = seam - j
+            for length in (j, j + 1, 8):
+                pattern = text[start:start + length]
+                for search_start in (0, start - 100, start, start + 1):
+                    expected = text.find(pattern, search_start)
+                    assert pi_search.find_pattern(pattern, search_start, use_cache=False) == expected, (pattern, search_start)
+
+        # Absent patterns scan every block to the end
+        assert pi_search.find_pattern('0' * 12, seam - 5, use_cache=False) == text.find('0' * 12, seam - 5)
+    pi_search.close()